@@ -1,7 +1,12 @@
+import json
+import os
 import requests
 import sys
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 
-BASE_URL = 'http://localhost:5000/homepage/api/tasks'
+# Point TMS_BASE_URL at another server (e.g. the ASGI mode) to run the same checks against it
+BASE_URL = os.environ.get('TMS_BASE_URL', 'http://localhost:5000') + '/homepage/api/tasks'
 
 # Color codes for terminal output
 GREEN = '\033[92m'
@@ -369,6 +374,695 @@ except Exception as e:
     print_error(f"Exception occurred: {e}")
     failed += 1
 
+# ============================================================================
+# PART 7: PAGINATION
+# ============================================================================
+
+print_test_header(17, "Pagination: Walk All Pages with limit + cursor")
+try:
+    full = requests.get(f'{BASE_URL}?sort=priority').json().get('Tasks', [])
+    paged = []
+    cursor = None
+    while True:
+        params = {'sort': 'priority', 'limit': 2}
+        if cursor:
+            params['cursor'] = cursor
+        response = requests.get(BASE_URL, params=params)
+        if response.status_code != 200:
+            break
+        page = response.json()
+        paged.extend(page.get('Tasks', []))
+        cursor = page.get('next_cursor')
+        if not cursor:
+            break
+    if response.status_code == 200 and [t['id'] for t in paged] == [t['id'] for t in full]:
+        print_success(f"Paged through {len(paged)} tasks, same order as the full list")
+        passed += 1
+    else:
+        print_error(f"Paged result differs from the full list (status {response.status_code})")
+        failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+print_test_header(18, "Error: Pagination with Invalid Cursor")
+try:
+    response = requests.get(BASE_URL, params={'limit': 2, 'cursor': 'not-a-cursor'})
+    if response.status_code == 400:
+        print_success("Correctly rejected invalid cursor")
+        print_info(f"Response: {response.json()}")
+        passed += 1
+    else:
+        print_error(f"Wrong status code: {response.status_code} (expected 400)")
+        failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+# ============================================================================
+# PART 8: BULK OPERATIONS
+# ============================================================================
+
+bulk_ids = []
+
+print_test_header(19, "Bulk: Add Tasks (One Invalid Priority)")
+try:
+    response = requests.post(
+        f'{BASE_URL}/bulk/add_Tasks',
+        json=[
+            {'description': 'Bulk task one', 'priority': 'high'},
+            {'description': 'Bulk task two'},
+            {'description': 'Bulk task bad', 'priority': 'super-mega-ultra'}
+        ]
+    )
+    if response.status_code == 200:
+        results = response.json()['results']
+        statuses = [item['status'] for item in results]
+        bulk_ids = [item['task']['id'] for item in results if item['status'] == 201]
+        if statuses == [201, 201, 400]:
+            print_success(f"Added {len(bulk_ids)} tasks, rejected the invalid one")
+            passed += 1
+        else:
+            print_error(f"Unexpected per-item statuses: {statuses}")
+            failed += 1
+    else:
+        print_error(f"Bulk add failed: {response.status_code}")
+        failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+print_test_header(20, "Bulk: Update Tasks (One Unknown ID, One Invalid Value)")
+try:
+    response = requests.patch(
+        f'{BASE_URL}/bulk/updated_task',
+        json=[{'id': task_id, 'completed': True} for task_id in bulk_ids] + [{'id': 'fake-uuid-9999', 'completed': True}]
+             + [{'id': bulk_ids[0], 'completed': 'maybe'}, {'id': {'a': 1}, 'completed': True}]
+    )
+    if response.status_code == 200:
+        results = response.json()['results']
+        statuses = [item['status'] for item in results]
+        all_completed = all(item['task']['completed'] for item in results if item['status'] == 200)
+        if statuses == [200] * len(bulk_ids) + [404, 400, 400] and all_completed:
+            print_success("Updated the known tasks, 404 for the unknown one, 400 for the invalid value and id")
+            passed += 1
+        else:
+            print_error(f"Unexpected per-item results: {results}")
+            failed += 1
+    else:
+        print_error(f"Bulk update failed: {response.status_code}")
+        failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+print_test_header(21, "Bulk: Delete Tasks (Non-String IDs Rejected Per Item)")
+try:
+    response = requests.delete(
+        f'{BASE_URL}/bulk/delete_task',
+        json=[{'id': task_id} for task_id in bulk_ids] + [{'id': {'a': 1}}, {'id': [1]}]
+    )
+    statuses = [item['status'] for item in response.json()['results']] if response.status_code == 200 else None
+    if statuses == [200] * len(bulk_ids) + [400, 400]:
+        print_success(f"Deleted {len(bulk_ids)} tasks in one request, 400 for the non-string ids")
+        passed += 1
+    else:
+        print_error(f"Bulk delete failed: {response.status_code}")
+        failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+# ============================================================================
+# PART 9: STREAMING
+# ============================================================================
+
+print_test_header(22, "Streaming: NDJSON List Matches the JSON List")
+try:
+    full = requests.get(f'{BASE_URL}?sort=due_date').json().get('Tasks', [])
+    response = requests.get(BASE_URL, params={'sort': 'due_date'}, headers={'Accept': 'application/x-ndjson'}, stream=True)
+    streamed = [json.loads(line) for line in response.iter_lines() if line]
+    if response.status_code == 200 and [t['id'] for t in streamed] == [t['id'] for t in full]:
+        print_success(f"Streamed {len(streamed)} tasks as {response.headers.get('Content-Type')}")
+        passed += 1
+    else:
+        print_error(f"Streamed list differs from the JSON list (status {response.status_code})")
+        failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+# ============================================================================
+# PART 10: RESPONSE CACHE
+# ============================================================================
+
+print_test_header(23, "Cache: Repeated List Is a Hit, a Write Invalidates It")
+try:
+    before = requests.get(f'{BASE_URL}/cache_stats').json()
+    first = requests.get(f'{BASE_URL}?priority=medium').json().get('Tasks', [])
+    requests.get(f'{BASE_URL}?priority=medium')
+    after = requests.get(f'{BASE_URL}/cache_stats').json()
+    response = requests.post(f'{BASE_URL}/add_Tasks', json={'description': 'Cache check task', 'priority': 'medium'})
+    added_id = response.json()['task']['id']
+    second = requests.get(f'{BASE_URL}?priority=medium').json().get('Tasks', [])
+    requests.delete(f'{BASE_URL}/delete_task', json={'id': added_id})
+    if after['hits'] > before['hits'] and len(second) == len(first) + 1:
+        print_success(f"Cache hits went from {before['hits']} to {after['hits']}, new task visible after the write")
+        passed += 1
+    else:
+        print_error(f"Unexpected cache behaviour: {before} -> {after}, {len(first)} -> {len(second)} tasks")
+        failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+# ============================================================================
+# PART 11: CONDITIONAL REQUESTS
+# ============================================================================
+
+print_test_header(24, "ETag: Unchanged List and Task Return 304")
+try:
+    response = requests.get(BASE_URL)
+    list_etag = response.headers.get('ETag')
+    list_status = requests.get(BASE_URL, headers={'If-None-Match': list_etag}).status_code
+    some_id = response.json()['Tasks'][0]['id']
+    task_etag = requests.get(f'{BASE_URL}/{some_id}').headers.get('ETag')
+    task_status = requests.get(f'{BASE_URL}/{some_id}', headers={'If-None-Match': task_etag}).status_code
+    if list_etag and list_status == 304 and task_status == 304:
+        print_success(f"List ETag {list_etag} and task ETag {task_etag} both revalidated with 304")
+        passed += 1
+    else:
+        print_error(f"Expected 304s, got list {list_status} and task {task_status}")
+        failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+print_test_header(25, "ETag: A Write Changes the List ETag")
+try:
+    list_etag = requests.get(BASE_URL).headers.get('ETag')
+    response = requests.post(f'{BASE_URL}/add_Tasks', json={'description': 'ETag check task'})
+    added_id = response.json()['task']['id']
+    status = requests.get(BASE_URL, headers={'If-None-Match': list_etag}).status_code
+    requests.delete(f'{BASE_URL}/delete_task', json={'id': added_id})
+    if status == 200:
+        print_success("Old ETag no longer matches after adding a task")
+        passed += 1
+    else:
+        print_error(f"Wrong status code: {status} (expected 200)")
+        failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+# ============================================================================
+# PART 12: DELTA SYNC
+# ============================================================================
+
+print_test_header(26, "Sync: Only Changes Since the Last Version, Deletes as Tombstones")
+try:
+    version = requests.get(f'{BASE_URL}/sync').json()['version']
+    added_id = requests.post(f'{BASE_URL}/add_Tasks', json={'description': 'Sync check task'}).json()['task']['id']
+    requests.delete(f'{BASE_URL}/delete_task', json={'id': added_id})
+    kept_id = requests.post(f'{BASE_URL}/add_Tasks', json={'description': 'Sync kept task'}).json()['task']['id']
+    delta = requests.get(f'{BASE_URL}/sync', params={'since': version}).json()
+    changed_ids = [task['id'] for task in delta['changed']]
+    deleted_ids = [tombstone['id'] for tombstone in delta['deleted']]
+    requests.delete(f'{BASE_URL}/delete_task', json={'id': kept_id})
+    if changed_ids == [kept_id] and deleted_ids == [added_id] and delta['version'] > version:
+        print_success(f"Delta from version {version} to {delta['version']}: 1 changed, 1 deleted")
+        passed += 1
+    else:
+        print_error(f"Unexpected delta: changed {changed_ids}, deleted {deleted_ids}")
+        failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+# ============================================================================
+# PART 13: SERVER-SENT EVENTS
+# ============================================================================
+
+print_test_header(27, "Events: A New Task Is Pushed to Subscribers")
+try:
+    stream = requests.get(f'{BASE_URL}/events', stream=True, timeout=10)
+    lines = stream.iter_lines(decode_unicode=True)
+    # The server greets each subscriber first, after that the subscription is live
+    while next(lines) != ': connected':
+        pass
+    added_id = requests.post(f'{BASE_URL}/add_Tasks', json={'description': 'Event check task'}).json()['task']['id']
+    event_type = None
+    event_data = None
+    for line in lines:
+        if line.startswith('event: '):
+            event_type = line[len('event: '):]
+        elif line.startswith('data: '):
+            event_data = json.loads(line[len('data: '):])
+            break
+    stream.close()
+    requests.delete(f'{BASE_URL}/delete_task', json={'id': added_id})
+    if event_type == 'task-created' and event_data.get('id') == added_id:
+        print_success(f"Received {event_type} for task {added_id}")
+        passed += 1
+    else:
+        print_error(f"Unexpected event: {event_type} {event_data}")
+        failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+# ============================================================================
+# PART 14: CONCURRENT WRITES
+# ============================================================================
+
+print_test_header(28, "Concurrency: Parallel Adds All Succeed")
+try:
+    def add_concurrent(number):
+        return requests.post(f'{BASE_URL}/add_Tasks', json={'description': f'Concurrent task {number}'})
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        responses = list(pool.map(add_concurrent, range(48)))
+    statuses = [response.status_code for response in responses]
+    for response in responses:
+        if response.status_code == 201:
+            requests.delete(f'{BASE_URL}/delete_task', json={'id': response.json()['task']['id']})
+    if statuses.count(201) == len(statuses):
+        print_success(f"{len(statuses)} parallel adds returned 201")
+        passed += 1
+    else:
+        print_error(f"Unexpected statuses: {sorted(set(statuses))}")
+        failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+print_test_header(29, "Concurrency: Write Batcher Counters")
+try:
+    stats = requests.get(f'{BASE_URL}/write_stats').json()
+    # With TMS_WRITE_BATCH_WINDOW_MS set the parallel adds above were grouped into shared commits
+    if not stats['enabled'] or stats['items'] >= 48 and stats['batches'] <= stats['items']:
+        print_success(f"Batching {'on' if stats['enabled'] else 'off'}: {stats['batches']} batches, "
+                      f"{stats['items']} writes, largest {stats['largest_batch']}")
+        passed += 1
+    else:
+        print_error(f"Unexpected write stats: {stats}")
+        failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+# ============================================================================
+# PART 15: FULL-TEXT SEARCH
+# ============================================================================
+
+print_test_header(30, "Search: q= Finds Tasks by Word Prefix, Edits and Deletes Stay in Sync")
+try:
+    report_id = requests.post(f'{BASE_URL}/add_Tasks', json={'description': 'Prepare quarterly zephyr report'}).json()['task']['id']
+    other_id = requests.post(f'{BASE_URL}/add_Tasks', json={'description': 'Water the plants'}).json()['task']['id']
+    by_prefix = [task['id'] for task in requests.get(BASE_URL, params={'q': 'zeph quart'}).json()['Tasks']]
+    requests.patch(f'{BASE_URL}/updated_task', json={'id': report_id, 'description': 'Prepare yearly report'})
+    after_edit = [task['id'] for task in requests.get(BASE_URL, params={'q': 'zephyr'}).json()['Tasks']]
+    requests.delete(f'{BASE_URL}/delete_task', json={'id': other_id})
+    after_delete = [task['id'] for task in requests.get(BASE_URL, params={'q': 'plants'}).json()['Tasks']]
+    requests.delete(f'{BASE_URL}/delete_task', json={'id': report_id})
+    # Relevance pages continue from the rank of the last task, and read back the unpaged order
+    ranked_ids = [requests.post(f'{BASE_URL}/add_Tasks', json={'description': 'Kestrel ' * (number % 3 + 1)}).json()['task']['id']
+                  for number in range(7)]
+    unpaged = [task['id'] for task in requests.get(BASE_URL, params={'q': 'kestrel'}).json()['Tasks']]
+    paged, cursor = [], None
+    while True:
+        page = requests.get(BASE_URL, params={'q': 'kestrel', 'limit': 3, **({'cursor': cursor} if cursor else {})}).json()
+        paged += [task['id'] for task in page['Tasks']]
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    requests.delete(f'{BASE_URL}/bulk/delete_task', json=[{'id': task_id} for task_id in ranked_ids])
+    if by_prefix == [report_id] and after_edit == [] and after_delete == [] \
+            and len(unpaged) == 7 and paged == unpaged:
+        print_success("Prefix search matched, the edit and the delete left the index, relevance pages line up")
+        passed += 1
+    else:
+        print_error(f"Unexpected search results: {by_prefix}, {after_edit}, {after_delete}, {paged} vs {unpaged}")
+        failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+# ============================================================================
+# PART 16: DUE-DATE REMINDERS
+# ============================================================================
+
+print_test_header(31, "Reminders: A Task Due in One Second Fires a task-reminder Event")
+try:
+    stream = requests.get(f'{BASE_URL}/events', stream=True, timeout=10)
+    lines = stream.iter_lines(decode_unicode=True)
+    while next(lines) != ': connected':
+        pass
+    due_date = (datetime.now() + timedelta(seconds=1)).isoformat()
+    added_id = requests.post(f'{BASE_URL}/add_Tasks', json={'description': 'Reminder check task', 'due_date': due_date}).json()['task']['id']
+    event_type = None
+    reminded_id = None
+    for line in lines:
+        if line.startswith('event: '):
+            event_type = line[len('event: '):]
+        elif line.startswith('data: ') and event_type == 'task-reminder':
+            reminded_id = json.loads(line[len('data: '):]).get('id')
+            break
+    stream.close()
+    requests.delete(f'{BASE_URL}/delete_task', json={'id': added_id})
+    if reminded_id == added_id:
+        print_success(f"Received task-reminder for task {added_id}")
+        passed += 1
+    else:
+        print_error(f"Unexpected reminder: {reminded_id}")
+        failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+print_test_header(32, "Error: Add Task with an Invalid due_date")
+try:
+    response = requests.post(f'{BASE_URL}/add_Tasks', json={'description': 'Bad date task', 'due_date': 'tomorrow'})
+    if response.status_code == 400:
+        print_success(f"Rejected with 400: {response.json().get('error')}")
+        passed += 1
+    else:
+        print_error(f"Expected 400, got {response.status_code}")
+        failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+# ============================================================================
+# PART 17: RESPONSE FORMATS
+# ============================================================================
+
+print_test_header(33, "Formats: MessagePack List Matches the JSON List")
+try:
+    json_tasks = requests.get(BASE_URL).json()['Tasks']
+    response = requests.get(BASE_URL, headers={'Accept': 'application/msgpack'})
+    if response.status_code == 406:
+        print_success("msgpack is not installed on the server, answered 406")
+        passed += 1
+    else:
+        import msgpack
+        msgpack_tasks = msgpack.unpackb(response.content)['Tasks']
+        if response.headers['Content-Type'] == 'application/msgpack' and msgpack_tasks == json_tasks:
+            print_success(f"{len(msgpack_tasks)} tasks, {len(response.content)} bytes of MessagePack")
+            passed += 1
+        else:
+            print_error("MessagePack list differs from the JSON list")
+            failed += 1
+except ImportError:
+    print_info("msgpack is not installed here, skipped")
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+# ============================================================================
+# PART 18: STATS
+# ============================================================================
+
+print_test_header(34, "Stats: Counters Follow Adds, Updates and Deletes, a Started Series Is Not Overdue")
+try:
+    before = requests.get(f'{BASE_URL}/stats').json()
+    past_due = (datetime.now() - timedelta(hours=1)).isoformat()
+    added_id = requests.post(f'{BASE_URL}/add_Tasks', json={'description': 'Stats check task', 'priority': 'urgent', 'due_date': past_due}).json()['task']['id']
+    added = requests.get(f'{BASE_URL}/stats').json()
+    requests.patch(f'{BASE_URL}/updated_task', json={'id': added_id, 'completed': True})
+    completed = requests.get(f'{BASE_URL}/stats').json()
+    requests.delete(f'{BASE_URL}/delete_task', json={'id': added_id})
+    series_id = requests.post(f'{BASE_URL}/add_Tasks', json={'description': 'Stats check series', 'priority': 'urgent',
+                                                             'due_date': past_due, 'recurrence': 'FREQ=DAILY'}).json()['task']['id']
+    with_series = requests.get(f'{BASE_URL}/stats').json()
+    requests.delete(f'{BASE_URL}/delete_task', json={'id': series_id})
+    after = requests.get(f'{BASE_URL}/stats').json()
+    listed = requests.get(BASE_URL).json()['Tasks']
+    checks = [
+        added['total'] == before['total'] + 1,
+        added['overdue'] == before['overdue'] + 1,
+        added['by_priority']['urgent']['pending'] == before['by_priority']['urgent']['pending'] + 1,
+        completed['completed'] == before['completed'] + 1 and completed['overdue'] == before['overdue'],
+        with_series['pending'] == before['pending'] + 1 and with_series['overdue'] == before['overdue'],
+        after == before,
+        after['total'] == len(listed) and after['completed'] == sum(1 for task in listed if task['completed']),
+    ]
+    if all(checks):
+        print_success(f"Stats: {after['total']} total, {after['completed']} completed, {after['overdue']} overdue")
+        passed += 1
+    else:
+        print_error(f"Unexpected stats checks: {checks}")
+        failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+# ============================================================================
+# PART 19: METRICS
+# ============================================================================
+
+print_test_header(35, "Metrics: Server-Timing Header and Prometheus Counters for the List Route")
+try:
+    metrics_url = BASE_URL.split('/homepage')[0] + '/metrics'
+    listed = requests.get(BASE_URL, params={'limit': 5})
+    response = requests.get(metrics_url)
+    if response.status_code == 404:
+        if 'Server-Timing' not in listed.headers:
+            print_success("Metrics are off on this server (TMS_METRICS), answered 404 and no Server-Timing")
+            passed += 1
+        else:
+            print_error("Server-Timing sent while /metrics is off")
+            failed += 1
+    else:
+        text = response.text
+        if (response.headers['Content-Type'].startswith('text/plain') and 'db;dur=' in listed.headers.get('Server-Timing', '')
+                and 'tms_requests_total{method="GET",route="/homepage/api/tasks",status="200"}' in text
+                and 'tms_request_duration_seconds_bucket{method="GET",route="/homepage/api/tasks",le="+Inf"}' in text):
+            print_success(f"Server-Timing: {listed.headers['Server-Timing']}")
+            passed += 1
+        else:
+            print_error("Missing Server-Timing header or list route series in /metrics")
+            failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+print_test_header(36, "Metrics: Slow-Query Log Lists Shapes with Their Query Plans")
+try:
+    response = requests.get(f'{BASE_URL}/slow_queries')
+    body = response.json()
+    if response.status_code == 200 and 'threshold_ms' in body and all(
+            {'statement', 'count', 'max_ms', 'plan'} <= set(shape) for shape in body['shapes']):
+        print_success(f"Threshold {body['threshold_ms']} ms, {len(body['shapes'])} slow statement shapes")
+        passed += 1
+    else:
+        print_error(f"Unexpected slow query log: {response.status_code} {body}")
+        failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+# ============================================================================
+# PART 20: USERS
+# ============================================================================
+
+print_test_header(37, "Users: Tokens Scope Every Task Route to Their Owner")
+try:
+    users_url = BASE_URL.split('/homepage')[0] + '/homepage/api/users'
+    suffix = datetime.now().strftime('%H%M%S%f')
+    headers = {}
+    for name in ('alice', 'bob'):
+        username = f'{name}_{suffix}'
+        registered = requests.post(f'{users_url}/register', json={'username': username, 'password': 'correct horse'})
+        token = requests.post(f'{users_url}/login', json={'username': username, 'password': 'correct horse'}).json()['token']
+        headers[name] = {'Authorization': f'Bearer {token}'}
+    alice, bob = headers['alice'], headers['bob']
+    task_id = requests.post(f'{BASE_URL}/add_Tasks', json={'description': 'Alice only task'}, headers=alice).json()['task']['id']
+    checks = [
+        registered.status_code == 201,
+        requests.get(f'{users_url}/me', headers=bob).json()['user']['username'] == f'bob_{suffix}',
+        [task['id'] for task in requests.get(BASE_URL, headers=alice).json()['Tasks']] == [task_id],
+        requests.get(BASE_URL, headers=bob).json()['Tasks'] == [],
+        requests.get(f'{BASE_URL}/stats', headers=bob).json()['total'] == 0,
+        requests.get(f'{BASE_URL}/{task_id}', headers=bob).status_code == 404,
+        requests.patch(f'{BASE_URL}/updated_task', json={'id': task_id, 'completed': True}, headers=bob).status_code == 404,
+        requests.delete(f'{BASE_URL}/delete_task', json={'id': task_id}, headers=bob).status_code == 404,
+        requests.get(BASE_URL, headers={'Authorization': 'Bearer not-a-token'}).status_code == 401,
+        task_id not in [task['id'] for task in requests.get(BASE_URL).json()['Tasks']],
+        requests.delete(f'{BASE_URL}/delete_task', json={'id': task_id}, headers=alice).status_code == 200,
+        requests.post(f'{users_url}/logout', headers=alice).status_code == 200,
+        requests.get(BASE_URL, headers=alice).status_code == 401,
+    ]
+    if all(checks):
+        print_success("Each user sees only their own tasks; bad and revoked tokens get 401")
+        passed += 1
+    else:
+        print_error(f"Unexpected ownership checks: {checks}")
+        failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+print_test_header(38, "Storage: Task List Reads Follow the Read Replica Routing")
+try:
+    before = requests.get(f'{BASE_URL}/read_stats').json()
+    requests.post(f'{BASE_URL}/add_Tasks', json={'description': 'Replica routing task'})
+    # Right after its own write a user reads from the primary, whether a replica is configured or not
+    listed = [task['description'] for task in requests.get(BASE_URL).json()['Tasks']]
+    after = requests.get(f'{BASE_URL}/read_stats').json()
+    if not before['replica']:
+        checks = [after['replica_reads'] == after['primary_reads'] == 0]
+    else:
+        checks = [after['primary_reads'] == before['primary_reads'] + 1, after['replica_reads'] == before['replica_reads']]
+    if 'Replica routing task' in listed and all(checks):
+        print_success(f"Replica {'on' if after['replica'] else 'off'}: {after['replica_reads']} replica reads, "
+                      f"{after['primary_reads']} primary reads")
+        passed += 1
+    else:
+        print_error(f"Unexpected read routing: {before} -> {after}")
+        failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+# ============================================================================
+# PART 21: ARCHIVE
+# ============================================================================
+
+print_test_header(39, "Archive: include_archived Lists Read Both Stores in One Order")
+try:
+    stats = requests.get(f'{BASE_URL}/archive_stats').json()
+    hot = [task['id'] for task in requests.get(BASE_URL).json()['Tasks']]
+    both = [task['id'] for task in requests.get(BASE_URL, params={'include_archived': 'true'}).json()['Tasks']]
+    paged, cursor = [], None
+    while True:
+        params = {'include_archived': 'true', 'sort': 'priority', 'limit': 3}
+        if cursor:
+            params['cursor'] = cursor
+        page = requests.get(BASE_URL, params=params).json()
+        paged += [task['id'] for task in page['Tasks']]
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    by_priority = [task['id'] for task in requests.get(BASE_URL, params={'include_archived': 'true', 'sort': 'priority'}).json()['Tasks']]
+    if set(hot) <= set(both) and len(both) == len(hot) + len(set(both) - set(hot)) and paged == by_priority \
+            and {'running', 'archived', 'batches'} <= set(stats):
+        print_success(f"{len(hot)} active tasks, {len(both) - len(hot)} archived, {stats['archived']} moved by this process")
+        passed += 1
+    else:
+        print_error(f"Unexpected archive listing: {len(hot)} active, {len(both)} with the archive, {stats}")
+        failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+# ============================================================================
+# PART 22: IMPORT AND EXPORT
+# ============================================================================
+
+print_test_header(40, "Transfer: Exports Import Back, Id Collisions Are Detected, Bulk Load Rebuilds the Indexes")
+try:
+    listed = {task['id'] for task in requests.get(BASE_URL).json()['Tasks']}
+    exported = requests.get(f'{BASE_URL}/export')
+    lines = [json.loads(line) for line in exported.text.splitlines()]
+    csv_export = requests.get(f'{BASE_URL}/export', params={'format': 'csv'})
+    replayed = requests.post(f'{BASE_URL}/import', data=exported.content,
+                             headers={'Content-Type': 'application/x-ndjson'}).json()
+    new_rows = ('description,priority,completed,due_date\n'
+                'Imported from CSV,high,false,2030-01-01T09:00:00\n'
+                'Imported done,low,true,\n'
+                ',urgent,false,\n')
+    added = requests.post(f'{BASE_URL}/import', params={'defer_indexes': 'true'}, data=new_rows.encode(),
+                          headers={'Content-Type': 'text/csv'}).json()
+    bad_ids = ''.join(json.dumps({'id': task_id, 'description': 'Bad id'}) + '\n'
+                      for task_id in ("x');alert(1);//", '<img src=x>'))
+    rejected = requests.post(f'{BASE_URL}/import', data=bad_ids.encode(),
+                             headers={'Content-Type': 'application/x-ndjson'}).json()
+    after = {task['id'] for task in requests.get(BASE_URL).json()['Tasks']}
+    stats = requests.get(f'{BASE_URL}/stats').json()
+    found = requests.get(BASE_URL, params={'q': 'imported from csv'}).json()['Tasks']
+    if {line['id'] for line in lines} == listed and csv_export.text.count('\n') == len(lines) + 1 \
+            and replayed['imported'] == 0 and replayed['skipped'] == len(lines) \
+            and added['imported'] == 2 and added['invalid'] == 1 and len(after) == len(listed) + 2 \
+            and rejected['imported'] == 0 and rejected['invalid'] == 2 and stats['total'] == len(after) \
+            and [task['description'] for task in found] == ['Imported from CSV']:
+        print_success(f"{len(lines)} tasks exported; re-import skipped {replayed['skipped']} collisions; "
+                      f"CSV bulk load added {added['imported']} and rejected {added['invalid']}")
+        passed += 1
+    else:
+        print_error(f"Unexpected transfer: {len(lines)} exported of {len(listed)}, {replayed}, {added}, {rejected}")
+        failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+print_test_header(41, "Recurring: Weekday Series Expands Into Occurrences, One Can Be Completed")
+try:
+    series = requests.post(f'{BASE_URL}/add_Tasks', json={
+        'description': 'Standup recurring', 'due_date': '2031-03-03T09:00:00',
+        'recurrence': 'FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR'}).json()['task']
+    window = {'occurrences': 'true', 'q': 'standup', 'due_from': '2031-03-03T00:00:00',
+              'due_to': '2031-03-17T00:00:00', 'limit': 4}
+    occurrences, cursor = [], None
+    while True:
+        page = requests.get(BASE_URL, params=dict(window, cursor=cursor) if cursor else window).json()
+        occurrences += page['Tasks']
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    second = occurrences[1]['Due Date']
+    done = requests.patch(f'{BASE_URL}/updated_occurrence',
+                          json={'id': series['id'], 'occurrence': second, 'completed': True})
+    saturday = requests.patch(f'{BASE_URL}/updated_occurrence',
+                              json={'id': series['id'], 'occurrence': '2031-03-08T09:00:00'})
+    completed = requests.get(BASE_URL, params=dict(window, completed='true', limit=20)).json()['Tasks']
+    listed = requests.get(BASE_URL, params={'q': 'standup'}).json()['Tasks']
+    days = {datetime.strptime(task['Due Date'], '%Y-%m-%d %H:%M:%S').weekday() for task in occurrences}
+    if series['recurrence'] == 'FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR' and len(occurrences) == 10 \
+            and len({task['Due Date'] for task in occurrences}) == 10 and days == {0, 1, 2, 3, 4} \
+            and done.status_code == 200 and saturday.status_code == 404 \
+            and [task['Due Date'] for task in completed] == [second] and len(listed) == 1:
+        print_success(f"10 weekday occurrences over 3 pages, {second} completed on its own, series stays one task")
+        passed += 1
+    else:
+        print_error(f"Unexpected occurrences: {len(occurrences)}, {done.status_code}, {saturday.status_code}, "
+                    f"{completed}, {len(listed)} listed")
+        failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+print_test_header(42, "Ids: New Tasks Get Time-Ordered 26 Character Ids")
+try:
+    ids = [requests.post(f'{BASE_URL}/add_Tasks', json={'description': f'Ordered id {number}'}).json()['task']['id']
+           for number in range(3)]
+    found = [requests.get(f'{BASE_URL}/{task_id}').status_code for task_id in ids]
+    requests.delete(f'{BASE_URL}/bulk/delete_task', json=[{'id': task_id} for task_id in ids])
+    if all(len(task_id) == 26 for task_id in ids) and ids == sorted(ids) and found == [200, 200, 200]:
+        print_success(f"Ids increase with creation time: {ids[0]} < {ids[1]} < {ids[2]}")
+        passed += 1
+    else:
+        print_error(f"Unexpected ids: {ids}, lookups {found}")
+        failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
+print_test_header(43, "Routing: GET on a Sibling Route Answers 405, Not a Task Lookup")
+try:
+    siblings = {name: requests.get(f'{BASE_URL}/{name}').status_code
+                for name in ('add_Tasks', 'updated_task', 'delete_task', 'import')}
+    unknown = requests.get(f'{BASE_URL}/NO_SUCH_TASK').status_code
+    if set(siblings.values()) == {405} and unknown == 404:
+        print_success("add_Tasks, updated_task, delete_task and import answer 405, an unknown id 404")
+        passed += 1
+    else:
+        print_error(f"Unexpected statuses: {siblings}, unknown id {unknown}")
+        failed += 1
+except Exception as e:
+    print_error(f"Exception occurred: {e}")
+    failed += 1
+
 # ============================================================================
 # FINAL STATE
 # ============================================================================
@@ -422,6 +1116,26 @@ if failed == 0:
     print("- Priority system")
     print("- Filtering by completion and priority")
     print("- Sorting by date and priority")
+    print("- Cursor pagination")
+    print("- Bulk add, update and delete")
+    print("- NDJSON streaming")
+    print("- List response cache")
+    print("- ETag / Last-Modified revalidation")
+    print("- Delta sync with tombstones")
+    print("- Server-Sent Events")
+    print("- Concurrent writes and group commit")
+    print("- Full-text search")
+    print("- Due-date reminders")
+    print("- MessagePack list format")
+    print("- Stats from maintained counters")
+    print("- Request metrics, Server-Timing and the slow-query log")
+    print("- User accounts and per-user task scoping")
+    print("- Read replica routing")
+    print("- Archived tasks")
+    print("- CSV / NDJSON import and export")
+    print("- Recurring tasks")
+    print("- Time-ordered task ids")
+    print("- Task id routes that leave sibling routes their 405")
     print("- Comprehensive error handling")
     print(f"{'='*70}{RESET}\n")
     sys.exit(0)
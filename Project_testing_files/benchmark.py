@@ -0,0 +1,330 @@
+# Description: Benchmark harness for the task API.
+# Seeds tms.db with a reproducible data set, drives each endpoint through Flask's test client in process
+# (or over real HTTP with --http against a running server), and prints p50/p95/p99 latency, throughput and
+# peak RSS per scenario as JSON. --compare takes an earlier JSON report and fails when a scenario regressed.
+#
+# Usage: python Project_testing_files/benchmark.py --tasks 100000 [--reseed] [--requests 500] [--concurrency 8]
+#                                                 [--scenarios list_page,get_task] [--no-cache]
+#                                                 [--http http://localhost:5000 [--server-pid PID]]
+#                                                 [--output run.json] [--compare baseline.json [--tolerance 0.2]]
+#
+# Seeding replaces every task in tms.db, so it only runs when tms.db holds a different number of tasks
+# and --reseed is given. Ids are the hex of the row number, descriptions come from a fixed vocabulary.
+# TMS_DATABASE_URL points it at another database, e.g. PostgreSQL, to compare the backends.
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app import (app, db, Task, task_list_cache, priority_order, bump_version_statement,  # noqa: E402
+                 read_data_version, setup_search_index, setup_task_counters, init_schema)
+
+API = '/homepage/api/tasks'
+SEED = 20251221
+SEED_CHUNK = 50000
+# Triggers dropped while seeding, the index and counters are rebuilt in one pass afterwards
+SEED_TRIGGERS = ['tasks_fts_insert', 'tasks_fts_delete', 'tasks_fts_update',
+                 'task_counters_insert', 'task_counters_delete', 'task_counters_update']
+
+
+def seed_rows(start, count, vocabulary, now):
+    rng = random.Random(SEED + start)
+    rows = []
+    for number in range(start, start + count):
+        created_at = now - timedelta(minutes=rng.randint(0, 525600))
+        rows.append({
+            'id': f'{number:08x}',
+            'description': ' '.join(rng.choices(vocabulary, k=6)),
+            'due_date': None if number % 10 == 0 else created_at + timedelta(days=rng.randint(-30, 60)),
+            'completed': number % 3 == 0,
+            'priority': priority_order[number % len(priority_order)],
+            'priority_rank': number % len(priority_order),
+            'created_at': created_at,
+            'updated_at': created_at,
+            'change_version': 0,
+        })
+    return rows
+
+
+def seed(total):
+    """Replace the tasks in tms.db with total generated tasks."""
+    rng = random.Random(SEED)
+    vocabulary = [''.join(rng.choices('abcdefghijklmnopqrstuvwxyz', k=rng.randint(3, 9))) for _ in range(20000)]
+    now = datetime(2026, 1, 1)
+    started = time.perf_counter()
+    with db.engine.begin() as connection:
+        # The SQLite index and counter triggers are recreated and refilled in one pass after the load
+        if db.engine.dialect.name == 'sqlite':
+            for trigger in SEED_TRIGGERS:
+                connection.execute(db.text(f'DROP TRIGGER IF EXISTS {trigger}'))
+        connection.execute(db.delete(Task))
+    for start in range(0, total, SEED_CHUNK):
+        with db.engine.begin() as connection:
+            connection.execute(db.insert(Task), seed_rows(start, min(SEED_CHUNK, total - start), vocabulary, now))
+        print(f'seeded {min(start + SEED_CHUNK, total)} of {total} tasks', file=sys.stderr)
+    setup_search_index(rebuild=True)
+    setup_task_counters(reconcile=True)
+    with db.engine.begin() as connection:
+        # Nothing cached from the old data set may be served again
+        connection.execute(bump_version_statement())
+        connection.execute(db.text('ANALYZE'))
+    return round(time.perf_counter() - started, 1)
+
+
+def sample_ids(count):
+    return list(db.session.scalars(db.select(Task.id).order_by(db.func.random()).limit(count)))
+
+
+def sample_words(ids):
+    descriptions = db.session.scalars(db.select(Task.description).where(Task.id.in_(ids[:50])))
+    return [description.split()[0] for description in descriptions if description]
+
+
+class Context:
+    """Data the scenarios draw from: existing ids, search words, and the ids created by add_task."""
+
+    def __init__(self, ids, words):
+        self.ids = ids
+        self.words = words or ['task']
+        self.added = []
+        self.lock = threading.Lock()
+
+    def pick(self, number):
+        return self.ids[number % len(self.ids)]
+
+    def take_added(self):
+        with self.lock:
+            return self.added.pop() if self.added else None
+
+
+# Each scenario turns a request number into (method, path, query string, JSON body, headers).
+# delete_task removes the tasks add_task created, so it runs after it.
+SCENARIOS = {
+    'list_page': lambda ctx, n: ('GET', API, {'limit': 100}, None, {}),
+    'list_filtered': lambda ctx, n: ('GET', API, {'limit': 100, 'completed': 'false',
+                                                  'priority': priority_order[n % 4], 'sort': 'due_date'}, None, {}),
+    'list_priority_sort': lambda ctx, n: ('GET', API, {'limit': 100, 'sort': 'priority'}, None, {}),
+    'list_not_modified': lambda ctx, n: ('GET', API, {'limit': 100}, None, {'If-None-Match': ctx.list_etag}),
+    'stream_page': lambda ctx, n: ('GET', API, {'limit': 1000, 'stream': '1'}, None, {}),
+    'search': lambda ctx, n: ('GET', API, {'q': ctx.words[n % len(ctx.words)], 'limit': 20}, None, {}),
+    'get_task': lambda ctx, n: ('GET', f'{API}/{ctx.pick(n)}', None, None, {}),
+    'stats': lambda ctx, n: ('GET', f'{API}/stats', None, None, {}),
+    'sync': lambda ctx, n: ('GET', f'{API}/sync', {'since': ctx.sync_since}, None, {}),
+    'add_task': lambda ctx, n: ('POST', f'{API}/add_Tasks', None, {'description': f'benchmark task {n}'}, {}),
+    'update_task': lambda ctx, n: ('PATCH', f'{API}/updated_task', None,
+                                   {'id': ctx.pick(n), 'description': f'benchmark update {n}'}, {}),
+    'delete_task': lambda ctx, n: ('DELETE', f'{API}/delete_task', None, {'id': ctx.take_added()}, {}),
+}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def peak_rss_mb(server_pid=None):
+    """Peak RSS of the server: this process in process, the --server-pid process over HTTP."""
+    if server_pid is None:
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor, 1)
+    try:
+        with open(f'/proc/{server_pid}/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def in_process_sender():
+    client = app.test_client()
+
+    def send(method, path, params, body, headers):
+        response = client.open(path, method=method, query_string=params, json=body, headers=headers)
+        response.get_data()
+        added_id = response.get_json()['task']['id'] if method == 'POST' and response.status_code == 201 else None
+        return response.status_code, added_id, response.headers.get('ETag', '')
+    return send
+
+
+def http_sender(base_url):
+    import requests
+    session = requests.Session()
+
+    def send(method, path, params, body, headers):
+        response = session.request(method, base_url + path, params=params, json=body, headers=headers)
+        added_id = response.json()['task']['id'] if method == 'POST' and response.status_code == 201 else None
+        return response.status_code, added_id, response.headers.get('ETag', '')
+    return send
+
+
+def run_scenario(name, ctx, requests_count, concurrency, make_sender, server_pid):
+    build = SCENARIOS[name]
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    counter = iter(range(requests_count))
+
+    def worker():
+        send = make_sender()
+        while True:
+            with lock:
+                number = next(counter, None)
+            if number is None:
+                return
+            request_args = build(ctx, number)
+            started = time.perf_counter()
+            status, added_id, _ = send(*request_args)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+                if added_id:
+                    ctx.added.append(added_id)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    return {
+        'scenario': name,
+        'requests': len(latencies),
+        'errors': sum(count for status, count in statuses.items() if status >= 400),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'throughput_per_s': round(len(latencies) / wall, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+        'max_ms': round(max(latencies) * 1000, 3),
+        'peak_rss_mb': peak_rss_mb(server_pid),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(report, baseline, tolerance):
+    """Return the lines describing scenarios whose p95 or throughput got worse than tolerance allows."""
+    before = {result['scenario']: result for result in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        old = before.get(result['scenario'])
+        if not old:
+            continue
+        if result['p95_ms'] > old['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{result['scenario']}: p95 {old['p95_ms']} ms -> {result['p95_ms']} ms")
+        if result['throughput_per_s'] < old['throughput_per_s'] * (1 - tolerance):
+            regressions.append(f"{result['scenario']}: throughput {old['throughput_per_s']}/s -> "
+                               f"{result['throughput_per_s']}/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the TMS task API')
+    parser.add_argument('--tasks', type=int, default=10000, help='tasks in tms.db, 10k to 10M')
+    parser.add_argument('--reseed', action='store_true', help='replace the tasks in tms.db when the count differs')
+    parser.add_argument('--requests', type=int, default=300, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=1, help='client threads per scenario')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='comma separated scenario names')
+    parser.add_argument('--no-cache', action='store_true', help='turn the in-process list cache off')
+    parser.add_argument('--http', help='base URL of a running server, instead of the in-process test client')
+    parser.add_argument('--server-pid', type=int, help='server process to read the peak RSS of in --http mode')
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    parser.add_argument('--compare', help='earlier JSON report to check this run against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown for --compare, 0.2 = 20%%')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f'unknown scenarios {unknown}, choose from {list(SCENARIOS)}')
+    if args.no_cache:
+        task_list_cache.max_entries = 0
+    # One log line per request would be timed along with it
+    logging.getLogger('app').setLevel(logging.WARNING)
+
+    init_schema()
+    with app.app_context():
+        existing = db.session.scalar(db.select(db.func.count()).select_from(Task))
+        seed_seconds = None
+        if existing != args.tasks:
+            if not args.reseed:
+                parser.error(f'tms.db holds {existing} tasks, not {args.tasks}; add --reseed to replace them')
+            db.session.remove()
+            seed_seconds = seed(args.tasks)
+        ids = sample_ids(1000)
+        ctx = Context(ids, sample_words(ids))
+        # sync asks for the changes made during the run, not the whole table
+        ctx.sync_since = read_data_version()
+
+    make_sender = (lambda: http_sender(args.http.rstrip('/'))) if args.http else in_process_sender
+    probe = make_sender()
+    # The 304 scenario revalidates the first page as it was before the writes
+    ctx.list_etag = probe('GET', API, {'limit': 100}, None, {})[2]
+
+    results = []
+    for name in names:
+        result = run_scenario(name, ctx, args.requests, args.concurrency, make_sender, args.server_pid)
+        results.append(result)
+        print(f"{name:>20}: p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, p99 {result['p99_ms']} ms, "
+              f"{result['throughput_per_s']}/s, {result['errors']} errors", file=sys.stderr)
+
+    # Leave the task count as it was for the next run
+    while ctx.added:
+        probe('DELETE', f'{API}/delete_task', None, {'id': ctx.added.pop()}, {})
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'mode': 'http' if args.http else 'in_process',
+            'tasks': args.tasks,
+            'seed_seconds': seed_seconds,
+            'requests_per_scenario': args.requests,
+            'concurrency': args.concurrency,
+            'list_cache': not args.no_cache,
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            report_file.write(output + '\n')
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(report, json.load(baseline_file), args.tolerance)
+        for line in regressions:
+            print(f'REGRESSION {line}', file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
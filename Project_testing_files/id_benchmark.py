@@ -0,0 +1,105 @@
+# Description: Insert throughput and primary key index layout of the task id schemes.
+# Fills a fresh SQLite database per scheme with the real tasks schema (indexes and triggers included) through
+# app.insert_task_rows(), --batch-size rows per transaction: once with the former ids (the first 8 characters
+# of a uuid4) and once with the ULIDs of app.new_task_id(). Reports rows/s overall and over the last tenth of
+# the rows, when the index is largest, then the pages and leaf fill of the id index from dbstat and how many
+# drawn ids collided with an earlier one (each would have been a failed insert).
+# Every scheme runs in its own process, as app.py reads TMS_DATABASE_URL when it is imported.
+#
+# Usage: python Project_testing_files/id_benchmark.py [--tasks 200000] [--batch-size 1000] [--json]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from uuid import uuid4
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+SCHEMES = ['random8', 'ulid']
+
+
+def run_scheme(scheme, tasks, batch_size):
+    from app import app, db, init_schema, insert_task_rows, new_task_id, local_user_id
+
+    draw = new_task_id if scheme == 'ulid' else lambda: str(uuid4())[:8]
+    seen = set()
+    collisions = 0
+    batches = []
+    now = datetime.utcnow()
+    init_schema()
+    with app.app_context():
+        for start in range(0, tasks, batch_size):
+            rows = []
+            for number in range(start, min(tasks, start + batch_size)):
+                task_id = draw()
+                while task_id in seen:
+                    collisions += 1
+                    task_id = draw()
+                seen.add(task_id)
+                rows.append({'id': task_id, 'description': f'id benchmark {number}', 'due_date': None,
+                             'completed': False, 'priority': 'low', 'priority_rank': 3, 'created_at': now,
+                             'updated_at': now, 'change_version': 0, 'user_id': local_user_id,
+                             'recurrence': None})
+            started = time.perf_counter()
+            insert_task_rows(rows)
+            db.session.commit()
+            batches.append((len(rows), time.perf_counter() - started))
+
+        connection = db.session.connection()
+        index = connection.exec_driver_sql(
+            "SELECT name FROM pragma_index_list('tasks') WHERE origin = 'pk'").scalar()
+        pages, leaf_pages, size, unused = connection.exec_driver_sql(
+            "SELECT count(*), sum(pagetype = 'leaf'), sum(pgsize), sum(unused) FROM dbstat WHERE name = ?",
+            (index,)).one()
+
+    tail = batches[-max(1, len(batches) // 10):]
+    return {
+        'scheme': scheme,
+        'tasks': tasks,
+        'rows_per_s': round(sum(count for count, _ in batches) / sum(elapsed for _, elapsed in batches)),
+        'last_tenth_rows_per_s': round(sum(count for count, _ in tail) / sum(elapsed for _, elapsed in tail)),
+        'id_index_pages': pages,
+        'id_index_leaf_pages': leaf_pages,
+        'id_index_leaf_fill': round(1 - unused / size, 3),
+        'collisions': collisions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the task id schemes')
+    parser.add_argument('--tasks', type=int, default=200000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    parser.add_argument('--scheme', choices=SCHEMES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scheme:
+        print(json.dumps(run_scheme(args.scheme, args.tasks, args.batch_size)))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for scheme in SCHEMES:
+            env = dict(os.environ, TMS_DATABASE_URL=f'sqlite:///{os.path.join(directory, scheme + ".db")}',
+                       TMS_REPLICA_DATABASE_URL='')
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), '--scheme', scheme,
+                                     '--tasks', str(args.tasks), '--batch-size', str(args.batch_size)],
+                                    env=env, check=True, capture_output=True, text=True).stdout
+            results.append(json.loads(output.splitlines()[-1]))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'scheme':>8} {'rows/s':>8} {'last 10%':>9} {'idx pages':>9} {'leaf fill':>9} {'collisions':>10}")
+    for result in results:
+        print(f"{result['scheme']:>8} {result['rows_per_s']:>8} {result['last_tenth_rows_per_s']:>9} "
+              f"{result['id_index_pages']:>9} {result['id_index_leaf_fill']:>9} {result['collisions']:>10}")
+
+
+if __name__ == '__main__':
+    main()
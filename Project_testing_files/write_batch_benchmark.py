@@ -0,0 +1,98 @@
+# Description: Latency and throughput of single-task adds with the group-commit writer at several windows.
+# Runs in process against app.py's database with one Flask test client per thread, and deletes the tasks
+# it added afterwards. A window of 0 is the one-commit-per-request path.
+#
+# Usage: python Project_testing_files/write_batch_benchmark.py [--threads 32] [--requests 2000]
+#                                                             [--windows 0,1,2,5,10] [--max-items 64] [--json]
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app import app, init_schema, write_batcher  # noqa: E402
+
+ADD_URL = '/homepage/api/tasks/add_Tasks'
+BULK_DELETE_URL = '/homepage/api/tasks/bulk/delete_task'
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_window(window_ms, max_items, threads, total):
+    write_batcher.configure(window_ms, max_items)
+    before = write_batcher.stats()
+    latencies = []
+    added_ids = []
+    errors = []
+    lock = threading.Lock()
+    per_thread = total // threads
+
+    def worker(number):
+        client = app.test_client()
+        for index in range(per_thread):
+            started = time.perf_counter()
+            response = client.post(ADD_URL, json={'description': f'bench {number}-{index}', 'priority': 'low'})
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if response.status_code == 201:
+                    added_ids.append(response.get_json()['task']['id'])
+                else:
+                    errors.append(response.status_code)
+
+    workers = [threading.Thread(target=worker, args=(number,)) for number in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    app.test_client().delete(BULK_DELETE_URL, json=[{'id': task_id} for task_id in added_ids])
+    after = write_batcher.stats()
+    batches = after['batches'] - before['batches']
+    return {
+        'window_ms': window_ms,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'throughput_per_s': round(len(latencies) / wall, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 2),
+        'average_batch': round((after['items'] - before['items']) / batches, 2) if batches else 1,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the group-commit write batcher')
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--windows', default='0,1,2,5,10', help='comma separated batch windows in milliseconds')
+    parser.add_argument('--max-items', type=int, default=64)
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = parser.parse_args()
+
+    init_schema()
+    results = [run_window(float(window), args.max_items, args.threads, args.requests)
+               for window in args.windows.split(',')]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'window ms':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'avg batch':>9} {'errors':>6}")
+    for result in results:
+        print(f"{result['window_ms']:>9} {result['throughput_per_s']:>8} {result['p50_ms']:>8} {result['p95_ms']:>8} "
+              f"{result['p99_ms']:>8} {result['average_batch']:>9} {result['errors']:>6}")
+
+
+if __name__ == '__main__':
+    main()
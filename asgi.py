@@ -0,0 +1,609 @@
+# Description: Async (ASGI) serving mode for the TMS task API.
+# The hot API routes of app.py run here as coroutines on async SQLAlchemy sessions (aiosqlite, or psycopg on
+# PostgreSQL), so one process can serve thousands of keep-alive, long-poll and SSE clients without a thread
+# per connection.
+# Every other path (HTML pages, bulk routes, imports, ...) falls through to the Flask app, which keeps working
+# on its own with `python app.py`.
+#
+# Run with:  uvicorn asgi:application --host 0.0.0.0 --port 5000
+#       or:  python asgi.py
+#       or:  TMS_SERVER=asgi gunicorn      (pre-forked workers, see gunicorn.conf.py)
+# Needs the packages listed in requirements-async.txt.
+
+import asyncio
+import json
+import logging
+import os
+import re
+from contextlib import asynccontextmanager
+from datetime import datetime
+from functools import wraps
+
+from a2wsgi import WSGIMiddleware
+from sqlalchemy.exc import SQLAlchemyError, OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.convertors import Convertor, register_url_convertor
+from starlette.middleware import Middleware
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Mount, Route
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+
+from app import (app as flask_app, db, Task, ArchivedTask, DataVersion, task_list_cache, task_events,
+                 answer_for_data_not_found, error_massage_for_try_except_Exception_in_jsonify_fromat,
+                 error_massage_for_database, stream_batch_size, event_heartbeat_seconds, chunked,
+                 data_state_statement, bump_version_statement, change_tracking_statements, task_event_payloads,
+                 is_not_modified, validator_headers, list_etag, task_etag, parse_task_list_args, task_list_queries,
+                 fetch_limit, task_list_body, list_format, validate_new_task, new_task_due_date, read_task_changes,
+                 parse_sync_args, sync_statements,
+                 sse_messages, sse_resync, sse_start_sequence, engine_options, configure_engine, database_locked,
+                 retry_delay, write_retry_attempts, error_massage_for_database_busy, write_batcher,
+                 write_batch_timeout, reminder_scheduler, start_background, task_rows, task_row_dict, encode_json,
+                 list_encoders, msgpack, task_stats_statements, task_stats_body, metrics_enabled, RequestTiming,
+                 current_request_timing, request_metrics, count_rows, timed_serialize, slow_query_log, auth_required,
+                 local_user_id, token_cache, hash_token, request_token, token_lookup_statement, resolve_token,
+                 unauthorized_body, replica_database_url, read_router, task_archiver,
+                 transfer_format, transfer_formats, export_query, export_chunk, new_task_recurrence, occurrence_page,
+                 task_id_pattern, fixed_task_route_names, init_schema)
+
+logger = logging.getLogger(__name__)
+
+# Async drivers for the sync URLs app.py is configured with; psycopg 3 serves both modes
+async_drivers = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+psycopg',
+                 'postgresql+psycopg2': 'postgresql+psycopg'}
+
+def async_engine(sync_engine):
+    url = sync_engine.url
+    engine = create_async_engine(url.set(drivername=async_drivers.get(url.drivername, url.drivername)),
+                                 **engine_options())
+    configure_engine(engine.sync_engine)
+    return engine
+
+with flask_app.app_context():
+    engine = async_engine(db.engine)
+    replica_engine = async_engine(db.engines['replica']) if replica_database_url else None
+Session = async_sessionmaker(engine, expire_on_commit=False)
+ReplicaSession = async_sessionmaker(replica_engine, expire_on_commit=False) if replica_engine else None
+
+
+def json_response(body, status=200, headers=None):
+    # Same encoder as the Flask list routes, so both modes send identical bytes and can share cached bodies
+    return Response(encode_json(body), status_code=status, headers=headers, media_type='application/json')
+
+def error_response(message, status):
+    return json_response({'error': message}, status)
+
+async def read_json(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+def retry_on_lock(handler):
+    """Async twin of app.retry_on_lock(): re-run the handler while SQLite reports the database as locked."""
+    @wraps(handler)
+    async def wrapper(request):
+        for attempt in range(write_retry_attempts):
+            try:
+                return await handler(request)
+            except OperationalError as e:
+                if not database_locked(e):
+                    raise
+                logger.warning(f"Database locked on {request.url.path}, retry {attempt + 1} of {write_retry_attempts}")
+                await asyncio.sleep(retry_delay(attempt))
+        logger.error(f"Database still locked after {write_retry_attempts} attempts on {request.url.path}")
+        return json_response({'error': error_massage_for_database_busy}, 503, {'Retry-After': '1'})
+    return wrapper
+
+def authenticated(handler):
+    """Async twin of app.authenticate_request(): sets request.state.user_id to the caller, or answers 401."""
+    @wraps(handler)
+    async def wrapper(request):
+        token = request_token(request.headers, request.query_params)
+        if token is None:
+            user_id = None if auth_required else local_user_id
+        else:
+            token_hash = hash_token(token)
+            user_id = token_cache.get(token_hash)
+            if user_id is None:
+                async with Session() as session:
+                    row = (await session.execute(token_lookup_statement(token_hash))).first()
+                user_id = resolve_token(token_hash, row)
+        if user_id is None:
+            return json_response(unauthorized_body(token), 401, {'WWW-Authenticate': 'Bearer'})
+        request.state.user_id = user_id
+        return await handler(request)
+    return wrapper
+
+def not_modified(request, etag, last_modified):
+    return is_not_modified(request.headers.get('if-none-match'), request.headers.get('if-modified-since'),
+                           etag, last_modified)
+
+def not_modified_response(etag, last_modified):
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
+
+async def read_data_version(session):
+    return (await session.execute(db.select(DataVersion.version).where(DataVersion.id == 1))).scalar_one()
+
+async def fetch_tasks(session, queries, limit=None):
+    connection = await session.connection()
+    tasks = []
+    for query in queries:
+        if limit is None:
+            tasks.extend(await connection.execute(task_rows(query)))
+            continue
+        if len(tasks) >= limit:
+            break
+        tasks.extend(await connection.execute(task_rows(query).limit(limit - len(tasks))))
+    count_rows(len(tasks))
+    return tasks
+
+async def commit_task_changes(session, touched, changed_ids=(), deleted_ids=(), created=False, owner=None):
+    """Async twin of app.commit_task_changes(): same statements, same cache and event updates."""
+    if engine.dialect.update_returning:
+        new_version = (await session.execute(bump_version_statement().returning(DataVersion.version))).scalar_one()
+    else:
+        await session.execute(bump_version_statement())
+        new_version = await read_data_version(session)
+    changed_ids = list(changed_ids)
+    deleted_ids = list(deleted_ids)
+    for statement, parameters in change_tracking_statements(new_version, changed_ids, deleted_ids, owner):
+        await session.execute(statement, parameters)
+    await session.commit()
+    task_list_cache.invalidate(new_version, set(touched))
+    read_router.note_writes({user_id for user_id, _, _ in touched})
+    reminder_scheduler.notify_write()
+    tasks = []
+    if task_events.subscribers and changed_ids:
+        for chunk in chunked(changed_ids):
+            tasks.extend(await session.scalars(db.select(Task).where(Task.id.in_(chunk))))
+    task_events.publish(task_event_payloads(tasks, deleted_ids, created, owner), new_version)
+
+
+async def batched_write(operation):
+    # The group-commit writer runs on its own thread with the sync engine; waiting for it holds no thread
+    return await asyncio.wait_for(asyncio.wrap_future(write_batcher.submit(operation)), write_batch_timeout)
+
+
+def list_read_sessions(user_id):
+    """Async twin of app.list_read_bind(): the replica's sessionmaker when one is configured."""
+    if ReplicaSession is not None and read_router.use_replica(user_id):
+        return ReplicaSession
+    return Session
+
+async def stream_tasks(read_sessions, queries, limit=None):
+    """Yield the tasks as NDJSON chunks, one database partition at a time."""
+    try:
+        async with read_sessions() as session:
+            remaining = limit
+            for query in queries:
+                if remaining is not None:
+                    query = query.limit(remaining)
+                connection = await session.connection()
+                result = await connection.stream(task_rows(query).execution_options(yield_per=stream_batch_size))
+                async for partition in result.partitions():
+                    if remaining is not None:
+                        remaining -= len(partition)
+                    yield b''.join(encode_json(task_row_dict(task)) for task in partition)
+                if remaining == 0:
+                    return
+    except SQLAlchemyError as e:
+        logger.error(f"Database error while streaming the tasks: {str(e)}")
+        yield json.dumps({'error': error_massage_for_database}) + '\n'
+
+async def stream_export(read_sessions, user_id, export_format, include_archived):
+    """Async twin of app.stream_export(): one export chunk per database partition."""
+    try:
+        if export_format == 'csv':
+            yield export_chunk((), export_format, header=True)
+        async with read_sessions() as session:
+            connection = await session.connection()
+            result = await connection.stream(export_query(user_id, include_archived)
+                                             .execution_options(yield_per=stream_batch_size))
+            async for partition in result.partitions():
+                yield export_chunk(partition, export_format)
+    except SQLAlchemyError as e:
+        logger.error(f"Database error while exporting the tasks: {str(e)}")
+        yield (json.dumps({'error': error_massage_for_database}) + '\n').encode()
+
+@authenticated
+async def get_tasks(request):
+    try:
+        spec, error = parse_task_list_args(request.query_params, request.state.user_id)
+
+        if error:
+            return error_response(error, 400)
+
+        response_format = list_format(request.query_params,
+                                      parse_accept_header(request.headers.get('accept'), MIMEAccept))
+        if response_format == 'msgpack' and msgpack is None:
+            return error_response('MessagePack responses need the msgpack package', 406)
+
+        read_sessions = list_read_sessions(request.state.user_id)
+        async with read_sessions() as session:
+            version, last_modified = (await session.execute(data_state_statement())).one()
+            etag = list_etag(version, response_format, request.state.user_id)
+            if not_modified(request, etag, last_modified):
+                return not_modified_response(etag, last_modified)
+
+            if spec['occurrences'] is not None:
+                # One bounded page of occurrences, expanded on the session's connection like app.get_tasks()
+                page = await session.run_sync(lambda sync_session: occurrence_page(spec, sync_session.connection()))
+                if response_format == 'ndjson':
+                    body, media_type = b''.join(encode_json(task) for task in page['Tasks']), 'application/x-ndjson'
+                else:
+                    encode, media_type = list_encoders[response_format]
+                    body = timed_serialize(lambda: encode(page))
+                return Response(body, media_type=media_type, headers=validator_headers(etag, last_modified))
+
+            queries = task_list_queries(spec)
+
+            if response_format == 'ndjson':
+                return StreamingResponse(stream_tasks(read_sessions, queries, spec['limit']), media_type='application/x-ndjson',
+                                         headers=validator_headers(etag, last_modified))
+
+            encode, media_type = list_encoders[response_format]
+            cache_key = spec['cache_key'] + (response_format,)
+            body = task_list_cache.get(cache_key, version) if task_list_cache.max_entries > 0 else None
+            if body is None:
+                tasks = await fetch_tasks(session, queries, fetch_limit(spec))
+                body = timed_serialize(lambda: encode(task_list_body(tasks, spec)))
+                task_list_cache.put(cache_key, body, version)
+            return Response(body, media_type=media_type, headers=validator_headers(etag, last_modified))
+    except SQLAlchemyError as e:
+        logger.error(f"Database error while Looking and sorting the tasks: {str(e)}")
+        return error_response(error_massage_for_database, 500)
+    except Exception as e:
+        logger.error(f'there was error in showing Tasks: {str(e)}')
+        return error_response(error_massage_for_try_except_Exception_in_jsonify_fromat, 500)
+
+@authenticated
+async def get_task(request):
+    task_id = request.path_params['task_id']
+    try:
+        async with Session() as session:
+            model = Task
+            state = (await session.execute(db.select(Task.updated_at).where(
+                Task.id == task_id, Task.user_id == request.state.user_id))).first()
+            if not state:
+                # Archived tasks stay readable
+                model = ArchivedTask
+                state = (await session.execute(db.select(ArchivedTask.updated_at).where(
+                    ArchivedTask.id == task_id, ArchivedTask.user_id == request.state.user_id))).first()
+
+            if not state:
+                return json_response({'message': 'Task not found'}, 404)
+
+            etag = task_etag(task_id, state.updated_at)
+            if not_modified(request, etag, state.updated_at):
+                return not_modified_response(etag, state.updated_at)
+
+            task = await session.get(model, task_id)
+            count_rows(1)
+            return json_response({'task': task.to_dict()}, headers=validator_headers(etag, state.updated_at))
+    except SQLAlchemyError as e:
+        logger.error(f"Database error while reading task {task_id}: {str(e)}")
+        return error_response(error_massage_for_database, 500)
+    except Exception as e:
+        logger.error(f"Unexpected error while reading task {task_id}: {str(e)}")
+        return error_response(error_massage_for_try_except_Exception_in_jsonify_fromat, 500)
+
+@authenticated
+@retry_on_lock
+async def add_task_api(request):
+    try:
+        data = await read_json(request)
+
+        if not data:
+            return error_response(answer_for_data_not_found, 400)
+
+        description, priority, error = validate_new_task(data)
+
+        if error:
+            return error_response(error, 400)
+
+        if write_batcher.enabled:
+            task = await batched_write(('add', request.state.user_id, description, priority, new_task_due_date(data),
+                                        new_task_recurrence(data)))
+            return json_response({'message': 'task added', 'task': task}, 201)
+
+        async with Session() as session:
+            try:
+                new_task = Task(description=description, due_date=new_task_due_date(data), priority=priority,
+                                recurrence=new_task_recurrence(data), user_id=request.state.user_id)
+                session.add(new_task)
+                await session.flush()
+                await commit_task_changes(session, [(new_task.user_id, False, priority)], changed_ids=[new_task.id],
+                                          created=True)
+            except SQLAlchemyError:
+                await session.rollback()
+                raise
+        return json_response({'message': 'task added', 'task': new_task.to_dict()}, 201)
+    except SQLAlchemyError as e:
+        if database_locked(e):
+            raise
+        logger.error(f"Database error while adding task: {str(e)}")
+        return error_response(error_massage_for_database, 500)
+    except Exception as e:
+        logger.error(f"Unexpected error while adding task: {str(e)}")
+        return error_response(error_massage_for_try_except_Exception_in_jsonify_fromat, 500)
+
+@authenticated
+@retry_on_lock
+async def delete_task(request):
+    try:
+        data = await read_json(request)
+
+        if not data:
+            return error_response(answer_for_data_not_found, 400)
+
+        task_id = data.get('id')
+
+        if not isinstance(task_id, str) or not task_id:
+            return error_response('Task ID is required', 400)
+
+        async with Session() as session:
+            try:
+                task = await session.get(Task, task_id)
+
+                if not task or task.user_id != request.state.user_id:
+                    return json_response({'message': 'Task not found'}, 404)
+
+                await session.delete(task)
+                await commit_task_changes(session, [(task.user_id, task.completed, task.priority)],
+                                          deleted_ids=[task_id], owner=task.user_id)
+            except SQLAlchemyError:
+                await session.rollback()
+                raise
+        logger.info(f"Task deleted: {task_id}")
+        return json_response({'message': 'Task deleted successfully'})
+    except SQLAlchemyError as e:
+        if database_locked(e):
+            raise
+        logger.error(f"Database error while deleting task: {str(e)}")
+        return error_response(error_massage_for_database, 500)
+    except Exception as e:
+        logger.error(f"Unexpected error while deleting task: {str(e)}")
+        return error_response(error_massage_for_try_except_Exception_in_jsonify_fromat, 500)
+
+@authenticated
+@retry_on_lock
+async def updated_task(request):
+    try:
+        data = await read_json(request)
+        if not data:
+            return error_response(answer_for_data_not_found, 400)
+
+        task_id = data.get('id')
+        if not isinstance(task_id, str) or not task_id:
+            return error_response('Task ID is required', 400)
+
+        changes, error = read_task_changes(data)
+        if error:
+            return error_response(error, 400)
+
+        if write_batcher.enabled:
+            task = await batched_write(('update', request.state.user_id, task_id, changes))
+            if task is None:
+                return json_response({'message': 'Task not found'}, 404)
+            return json_response({'message': 'The Task has been updated', 'task': task})
+
+        async with Session() as session:
+            try:
+                task = await session.get(Task, task_id)
+
+                if not task or task.user_id != request.state.user_id:
+                    return json_response({'message': 'Task not found'}, 404)
+
+                old_state = (task.user_id, task.completed, task.priority)
+
+                for name, value in changes.items():
+                    setattr(task, name, value)
+
+                await commit_task_changes(session, [old_state, (task.user_id, task.completed, task.priority)],
+                                          changed_ids=[task.id])
+                # Read back the columns refreshed by the commit (updated_at, change_version)
+                await session.refresh(task)
+            except SQLAlchemyError:
+                await session.rollback()
+                raise
+        return json_response({'message': 'The Task has been updated', 'task': task.to_dict()})
+    except SQLAlchemyError as e:
+        if database_locked(e):
+            raise
+        logger.error(f"Database error while updating task: {str(e)}")
+        return error_response(error_massage_for_database, 500)
+    except Exception as e:
+        logger.error(f"Unexpected error while updating task: {str(e)}")
+        return error_response(error_massage_for_try_except_Exception_in_jsonify_fromat, 500)
+
+@authenticated
+async def sync_tasks(request):
+    try:
+        since, since_time, error = parse_sync_args(request.query_params)
+
+        if error:
+            return error_response(error, 400)
+
+        async with Session() as session:
+            version = await read_data_version(session)
+            changed, deleted = sync_statements(version, since, since_time, request.state.user_id)
+            changed_tasks = await (await session.connection()).execute(task_rows(changed))
+            tombstones = await session.scalars(deleted) if deleted is not None else []
+            return json_response({
+                'version': version,
+                'changed': [task_row_dict(task) for task in changed_tasks],
+                'deleted': [tombstone.to_dict() for tombstone in tombstones]})
+    except SQLAlchemyError as e:
+        logger.error(f"Database error while syncing tasks: {str(e)}")
+        return error_response(error_massage_for_database, 500)
+    except Exception as e:
+        logger.error(f"Unexpected error while syncing tasks: {str(e)}")
+        return error_response(error_massage_for_try_except_Exception_in_jsonify_fromat, 500)
+
+async def stream_task_events(last_event_id, user_id):
+    """Async twin of app.stream_task_events(): an idle subscriber is a suspended coroutine."""
+    last_seen = sse_start_sequence(last_event_id, task_events.subscribe())
+    try:
+        yield 'retry: 3000\n: connected\n\n'
+        while True:
+            events = await task_events.wait_async(last_seen, event_heartbeat_seconds)
+            if events is None:
+                last_seen = task_events.sequence
+                yield sse_resync(last_seen)
+            elif events:
+                last_seen = events[-1][0]
+                yield sse_messages(events, user_id)
+            else:
+                yield ': keep-alive\n\n'
+                if task_events.version_check_due(event_heartbeat_seconds):
+                    async with engine.connect() as connection:
+                        version = (await connection.execute(
+                            db.select(DataVersion.version).where(DataVersion.id == 1))).scalar_one()
+                    task_events.note_version(version)
+    finally:
+        task_events.unsubscribe()
+
+@authenticated
+async def task_events_stream(request):
+    return StreamingResponse(stream_task_events(request.headers.get('last-event-id'), request.state.user_id),
+                             media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@authenticated
+async def export_tasks(request):
+    accept = parse_accept_header(request.headers.get('accept'), MIMEAccept)
+    export_format = transfer_format(request.query_params, accept.best_match(['application/x-ndjson', 'text/csv']))
+    if export_format is None:
+        return error_response(f'format must be one of: {list(transfer_formats)}', 400)
+    include_archived = request.query_params.get('include_archived', '').lower() in ('true', '1')
+    user_id = request.state.user_id
+    return StreamingResponse(stream_export(list_read_sessions(user_id), user_id, export_format, include_archived),
+                             media_type='text/csv' if export_format == 'csv' else 'application/x-ndjson',
+                             headers={'Content-Disposition': f'attachment; filename=tasks.{export_format}'})
+
+@authenticated
+async def task_cache_stats(request):
+    return json_response(task_list_cache.stats())
+
+@authenticated
+async def task_read_stats(request):
+    return json_response(dict(read_router.stats(), replica=replica_database_url is not None))
+
+@authenticated
+async def task_stats(request):
+    try:
+        async with Session() as session:
+            counts, upcoming = task_stats_statements(datetime.now(), request.state.user_id)
+            body = task_stats_body(await session.execute(counts), (await session.execute(upcoming)).scalar_one())
+        return json_response(body, headers={'Cache-Control': 'no-cache'})
+    except SQLAlchemyError as e:
+        logger.error(f"Database error while counting the tasks: {str(e)}")
+        return error_response(error_massage_for_database, 500)
+    except Exception as e:
+        logger.error(f"Unexpected error while counting the tasks: {str(e)}")
+        return error_response(error_massage_for_try_except_Exception_in_jsonify_fromat, 500)
+
+@authenticated
+async def task_write_stats(request):
+    return json_response(write_batcher.stats())
+
+@authenticated
+async def reminder_stats(request):
+    return json_response(reminder_scheduler.stats())
+
+@authenticated
+async def archive_stats(request):
+    return json_response(task_archiver.stats())
+
+@authenticated
+async def slow_queries(request):
+    return json_response(slow_query_log.stats())
+
+
+class TaskIdConvertor(Convertor):
+    """{task_id:task_id}: the twin of app.TaskIdConverter. Starlette cannot turn a match down once made, so the
+    names of the sibling routes are left out by the regex; those paths then reach the Flask app and its 405."""
+    regex = (f"(?!(?:{'|'.join(re.escape(name) for name in sorted(fixed_task_route_names()))})$)"
+             f"{task_id_pattern.pattern}")
+
+    def convert(self, value):
+        return value
+
+    def to_string(self, value):
+        return value
+
+register_url_convertor('task_id', TaskIdConvertor())
+
+routes = [
+    Route('/homepage/api/tasks', get_tasks, methods=['GET']),
+    Route('/homepage/api/tasks/add_Tasks', add_task_api, methods=['POST']),
+    Route('/homepage/api/tasks/delete_task', delete_task, methods=['DELETE']),
+    Route('/homepage/api/tasks/updated_task', updated_task, methods=['PATCH']),
+    Route('/homepage/api/tasks/sync', sync_tasks, methods=['GET']),
+    Route('/homepage/api/tasks/events', task_events_stream, methods=['GET']),
+    Route('/homepage/api/tasks/cache_stats', task_cache_stats, methods=['GET']),
+    Route('/homepage/api/tasks/read_stats', task_read_stats, methods=['GET']),
+    Route('/homepage/api/tasks/stats', task_stats, methods=['GET']),
+    Route('/homepage/api/tasks/write_stats', task_write_stats, methods=['GET']),
+    Route('/homepage/api/tasks/reminder_stats', reminder_stats, methods=['GET']),
+    Route('/homepage/api/tasks/archive_stats', archive_stats, methods=['GET']),
+    Route('/homepage/api/tasks/slow_queries', slow_queries, methods=['GET']),
+    Route('/homepage/api/tasks/export', export_tasks, methods=['GET']),
+    Route('/homepage/api/tasks/{task_id:task_id}', get_task, methods=['GET']),
+    # Everything else is served by the Flask app in a thread pool
+    Mount('/', app=WSGIMiddleware(flask_app)),
+]
+
+class RequestMetricsMiddleware:
+    """ASGI twin of app.py's request signals for the routes above; the Flask fallback times its own requests."""
+
+    def __init__(self, app, route_paths):
+        self.app = app
+        self.route_paths = route_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        timing = RequestTiming()
+        current_request_timing.set(timing)
+        status = None
+
+        async def timed_send(message):
+            nonlocal status
+            # The router has matched the endpoint by the time the response starts
+            if scope.get('endpoint') in self.route_paths:
+                if message['type'] == 'http.response.start':
+                    status = message['status']
+                    message['headers'] = [*message.get('headers', []),
+                                          (b'server-timing', timing.server_timing().encode())]
+                elif message['type'] == 'http.response.body':
+                    timing.bytes += len(message.get('body', b''))
+            await send(message)
+
+        await self.app(scope, receive, timed_send)
+        if status is not None:
+            request_metrics.observe(scope['method'], self.route_paths[scope['endpoint']], status, timing)
+
+# Same route labels as the Flask rules, so both modes report the same series
+route_paths = {route.endpoint: route.path.replace('{', '<').replace('}', '>')
+               for route in routes if isinstance(route, Route)}
+
+@asynccontextmanager
+async def lifespan(application):
+    # Done already in a worker forked from the gunicorn master, which ran it
+    init_schema()
+    start_background()
+    yield
+    await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+
+metrics_middleware = [Middleware(RequestMetricsMiddleware, route_paths=route_paths)] if metrics_enabled else None
+application = Starlette(routes=routes, lifespan=lifespan, middleware=metrics_middleware)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run('asgi:application', host=os.environ.get("TMS_HOST", "0.0.0.0"),
+                port=int(os.environ.get("TMS_PORT", "5000")), log_level='info')
@@ -0,0 +1,71 @@
+# Description: Production launcher for TMS: gunicorn pre-forks TMS_WORKERS worker processes from an app
+# preloaded in the master, one per core by default.
+#
+# Run with:  gunicorn                    (gunicorn reads this file from the working directory)
+#       or:  gunicorn -c gunicorn.conf.py
+# TMS_SERVER=asgi serves asgi:application on uvicorn workers instead of the Flask app on threaded workers.
+# Needs the packages listed in requirements-server.txt.
+#
+# Startup: the master imports the app once (preload_app), then runs app.init_schema() (db.create_all() and
+# upgrade_schema()) in when_ready, so the schema is set up by one process before any worker exists; the workers
+# inherit it done. The master then drops its pooled connections, and each worker forgets the ones it inherited
+# without closing them (SQLAlchemy's recipe for forked processes).
+#
+# Reload: kill -HUP <master pid> starts new workers with the re-read configuration and stops the old ones
+# gracefully, within TMS_GRACEFUL_TIMEOUT seconds. HUP forks from the code the master already holds; to deploy
+# new code, kill -USR2 the master (a new master preloads the new code and upgrades the schema), then
+# kill -TERM the old master once the new workers answer.
+#
+# Each worker has its own memory. How the per-process state stays consistent across workers:
+# - task list cache: entries are tagged with the data_version row that every write bumps, and a worker that reads
+#   another version drops them, so a write through any worker invalidates every worker's cache (TaskListCache)
+# - token cache: a token revoked through another worker keeps working here for TMS_TOKEN_CACHE_TTL seconds at most
+# - SSE streams: a worker that reads a version it did not publish sends a resync event to its own streams
+# - reminders and archiver: run by the one worker holding TMS_BACKGROUND_LOCK, another takes over when it exits;
+#   'sse' reminder events reach the streams of that worker only
+# - group commit (TMS_WRITE_BATCH_WINDOW_MS), /metrics, the slow-query log and the *_stats routes: per worker
+
+import multiprocessing
+import os
+import sys
+
+server = os.environ.get("TMS_SERVER", "wsgi")
+if server not in ('wsgi', 'asgi'):
+    raise ValueError('TMS_SERVER must be wsgi or asgi')
+
+wsgi_app = 'asgi:application' if server == 'asgi' else 'app:app'
+worker_class = 'uvicorn_worker.UvicornWorker' if server == 'asgi' else 'gthread'
+workers = int(os.environ.get("TMS_WORKERS", str(multiprocessing.cpu_count())))
+# Threads per Flask worker; an open SSE stream holds one of them
+threads = int(os.environ.get("TMS_WORKER_THREADS", "8"))
+bind = f'{os.environ.get("TMS_HOST", "0.0.0.0")}:{os.environ.get("TMS_PORT", "5000")}'
+preload_app = True
+graceful_timeout = int(os.environ.get("TMS_GRACEFUL_TIMEOUT", "30"))
+
+# Read by app.py when the master imports it, so it is set before that
+instance_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance')
+os.makedirs(instance_dir, exist_ok=True)
+os.environ.setdefault("TMS_BACKGROUND_LOCK", os.path.join(instance_dir, 'background.lock'))
+
+
+def when_ready(server):
+    from app import dispose_engines, init_schema
+    init_schema()
+    # The master serves nothing, it keeps no connection the workers could inherit
+    dispose_engines()
+
+
+def post_fork(server, worker):
+    from app import dispose_engines
+    dispose_engines(close=False)
+    asgi = sys.modules.get('asgi')
+    if asgi is not None:
+        for engine in filter(None, (asgi.engine, asgi.replica_engine)):
+            engine.sync_engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    # The ASGI app starts its background work from its lifespan, the Flask app has no such hook
+    if wsgi_app == 'app:app':
+        from app import start_background
+        start_background()